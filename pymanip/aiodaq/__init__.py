@@ -26,9 +26,11 @@ In principle, other library bindings could be implemented.
 """
 
 import asyncio
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from enum import IntEnum
 
-from pymanip.asynctools import synchronize_function
+import numpy as np
 
 
 class TerminalConfig(IntEnum):
@@ -46,7 +48,16 @@ class TimeoutException(Exception):
     pass
 
 
-class AcquisitionCard:
+def _as_list(x):
+    """Returns x if it is a sequence of values (but not a string),
+    and a one-item list otherwise.
+    """
+    if isinstance(x, str) or not hasattr(x, "__len__"):
+        return [x]
+    return x
+
+
+class AcquisitionCard(ABC):
     """Base class for all acquisition cards.
     The constructor takes no argument. Channels
     are added using the :meth:`~pymanip.aiodaq.daqmx.DAQmxSystem.add_channel` method,
@@ -63,7 +74,10 @@ class AcquisitionCard:
         self.last_read = 0
         self.sample_rate = None
         self.samples_per_chan = 1
-        self.loop = asyncio.get_event_loop()
+        # file-backed array receiving the data of read_analog, if requested
+        self.output = None
+        # driver calls of a card are serialized on a dedicated thread
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="aiodaq")
 
     def __enter__(self):
         """Context manager enter method
@@ -86,11 +100,14 @@ class AcquisitionCard:
         """
         return self.channels
 
+    @abstractmethod
     def close(self):
         """This method closes the connection to the acquisition card.
+        Concrete implementations must call it, to stop the driver thread.
         """
-        raise NotImplementedError()
+        self.executor.shutdown(wait=False)
 
+    @abstractmethod
     def add_channel(self, channel_name, terminal_config, voltage_range):
         """This method adds a channel for acquisition.
 
@@ -101,8 +118,8 @@ class AcquisitionCard:
         :param voltage_range: the voltage range for the channel (actual value may differ)
         :type voltage_range: float
         """
-        raise NotImplementedError()
 
+    @abstractmethod
     def configure_clock(self, sample_rate, samples_per_chan):
         """This method configures the board clock for the acquisition.
 
@@ -111,8 +128,8 @@ class AcquisitionCard:
         :param samples_per_chan: number of samples to be read on each channel
         :type samples_per_chan: int
         """
-        raise NotImplementedError()
 
+    @abstractmethod
     def configure_trigger(
         self,
         trigger_source=None,
@@ -131,22 +148,44 @@ class AcquisitionCard:
         :param trigger_config: the kind of triggering, e.g. EdgeRising. Defaults to EdgeRising.
         :type trigger_config: :class:`pymanip.aiodaq.TriggerConfig`, optional
         """
-        raise NotImplementedError()
 
+    @abstractmethod
     def start(self):
         """This method starts the acquisition
         """
-        raise NotImplementedError()
 
+    async def start_async(self):
+        """This asynchronous method runs :meth:`~pymanip.aiodaq.AcquisitionCard.start`
+        in an executor, so that the driver call does not block the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self.start)
+
+    @abstractmethod
     async def stop(self):
         """This asynchronous method aborts the acquisition
         """
-        raise NotImplementedError()
 
+    @abstractmethod
     async def read(self, tmo=None):
         """This asynchronous method reads data from the acquisition card.
         """
-        raise NotImplementedError()
+
+    def read_blocking(self, tmo=None):
+        """This method reads data from the acquisition card, blocking until
+        the data is available. The default implementation runs
+        :meth:`~pymanip.aiodaq.AcquisitionCard.read` in the current event loop.
+        """
+        loop = asyncio.get_event_loop()
+        return loop.run_until_complete(self.read(tmo))
+
+    def stop_blocking(self):
+        """This method aborts the acquisition, blocking until it is stopped.
+        The default implementation runs :meth:`~pymanip.aiodaq.AcquisitionCard.stop`
+        in the current event loop.
+        """
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(self.stop())
 
     async def start_read_stop(self, tmo=None):
         """This asynchronous method starts the acquisition, reads the data, and
@@ -155,19 +194,21 @@ class AcquisitionCard:
         :param tmo: timeout for reading, defaults to None
         :type tmo: float
         """
-        self.start()
+        await self.start_async()
         data = await self.read(tmo)
         await self.stop()
         return data
 
     def read_sync(self, tmo=None):
-        """This method is a synchronous wrapper around
+        """This method is the synchronous counterpart of the
         :meth:`~pymanip.aiodaq.AcquisitionCard.start_read_stop` method.
         It is a convenience facility for simple usage.
         """
-        loop = asyncio.get_event_loop()
-        data = loop.run_until_complete(self.start_read_stop(tmo))
-        return data
+        self.start()
+        try:
+            return self.read_blocking(tmo)
+        finally:
+            self.stop_blocking()
 
     async def read_analog(
         self,
@@ -208,36 +249,92 @@ class AcquisitionCard:
         :type verbose: bool, optional
         """
 
-        if isinstance(resource_names, str):
-            resource_names = [resource_names]
-        if isinstance(terminal_config, str):
-            terminal_config = [terminal_config]
+        self._configure_analog(
+            resource_names,
+            terminal_config,
+            volt_min,
+            volt_max,
+            samples_per_chan,
+            sample_rate,
+            output_filename,
+        )
         try:
-            terminal_config[0]
-        except TypeError:
-            terminal_config = [terminal_config]
-        try:
-            volt_min[0]
-        except TypeError:
-            volt_min = [volt_min]
-        try:
-            volt_max[0]
-        except TypeError:
-            volt_max = [volt_max]
+            data = await self.start_read_stop()
+            return self._write_output(data)
+        finally:
+            # later reads must not go to the output file, even on timeout
+            self.output = None
 
+    def _configure_analog(
+        self,
+        resource_names,
+        terminal_config,
+        volt_min,
+        volt_max,
+        samples_per_chan,
+        sample_rate,
+        output_filename=None,
+    ):
+        """Adds the channels and configures the clock for
+        :meth:`~pymanip.aiodaq.AcquisitionCard.read_analog`, and maps the
+        output file, if any.
+        """
         for chan_name, chan_tc, chan_vmin, chan_vmax in zip(
-            resource_names, terminal_config, volt_min, volt_max
+            _as_list(resource_names),
+            _as_list(terminal_config),
+            _as_list(volt_min),
+            _as_list(volt_max),
         ):
             volt_range = max([abs(chan_vmin), abs(chan_vmax)])
             self.add_channel(chan_name, chan_tc, volt_range)
         self.configure_clock(sample_rate, int(samples_per_chan))
         self.configure_trigger(None)
-        data = await self.start_read_stop()
-        return data
-
-    def read_analog_sync(self, *args, **kwargs):
-        """Synchronous wrapper around :meth:`pymanip.aiodaq.AcquisitionCard.read_analog`.
+        if output_filename is not None:
+            if len(self.channels) > 1:
+                shape = (len(self.channels), self.samples_per_chan)
+            else:
+                shape = (self.samples_per_chan,)
+            self.output = np.memmap(
+                output_filename, dtype=np.float64, mode="w+", shape=shape
+            )
+
+    def _write_output(self, data):
+        """Returns the data read by :meth:`~pymanip.aiodaq.AcquisitionCard.read_analog`.
+        If an output file was given, the data is copied to it, unless the backend
+        has already read it in place, and the mapped array is returned.
         """
-        loop = asyncio.get_event_loop()
-        data = loop.run_until_complete(self.read_analog(*args, **kwargs))
-        return data
+        output, self.output = self.output, None
+        if output is None or data is None:
+            return data
+        if not np.shares_memory(data, output):
+            output[...] = data
+        output.flush()
+        return output
+
+    def read_analog_sync(
+        self,
+        resource_names,
+        terminal_config,
+        volt_min=None,
+        volt_max=None,
+        samples_per_chan=1,
+        sample_rate=1,
+        coupling_types="DC",
+        output_filename=None,
+        verbose=True,
+    ):
+        """Synchronous counterpart of :meth:`pymanip.aiodaq.AcquisitionCard.read_analog`.
+        """
+        self._configure_analog(
+            resource_names,
+            terminal_config,
+            volt_min,
+            volt_max,
+            samples_per_chan,
+            sample_rate,
+            output_filename,
+        )
+        try:
+            return self._write_output(self.read_sync())
+        finally:
+            self.output = None
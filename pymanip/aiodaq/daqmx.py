@@ -14,15 +14,16 @@ module.
 """
 
 import asyncio
+import threading
 import time
 
 import numpy as np
 
 from nidaqmx import Task
-from nidaqmx.constants import READ_ALL_AVAILABLE
 from nidaqmx.errors import DaqError
 from nidaqmx.constants import TerminalConfiguration
 from nidaqmx.system import system, device
+from nidaqmx.stream_readers import AnalogMultiChannelReader
 
 from pymanip.aiodaq import (
     TerminalConfig,
@@ -49,7 +50,18 @@ class DAQmxSystem(AcquisitionCard):
         """
         super(DAQmxSystem, self).__init__()
         self.task = Task()
-        self.reading = False
+        self.reader = None
+        # driver properties, cached until the channels change
+        self.channel_names = []
+        self.max_rate = None
+        # acquisition completion, signaled by the driver done event
+        self.acq_done = False
+        self.done_waiter = None
+        self.done_lock = threading.Lock()
+        self.task.register_done_event(self._on_done)
+        # set when no read is in progress
+        self.read_done = asyncio.Event()
+        self.read_done.set()
         self.stop_lock = asyncio.Lock()
         self.read_lock = asyncio.Lock()
 
@@ -57,20 +69,26 @@ class DAQmxSystem(AcquisitionCard):
     def samp_clk_max_rate(self):
         """Maximum sample clock rate
         """
-        return self.task.timing.samp_clk_max_rate
+        if self.max_rate is None:
+            self.max_rate = self.task.timing.samp_clk_max_rate
+        return self.max_rate
 
     def possible_trigger_channels(self):
         """This method returns the list of channels that can be used as trigger.
         """
-        return [chan.name for chan in self.channels]
+        return list(self.channel_names)
 
     def close(self):
         """This method closes the active task, if there is one.
         """
         if self.task:
             self.channels = []
+            self.channel_names = []
+            self.max_rate = None
+            self.reader = None
             self.task.close()
             self.task = None
+        super().close()
 
     def add_channel(self, channel_name, terminal_config, voltage_range):
         """Concrete implementation of :meth:`pymanip.aiodaq.AcquisitionCard.add_channel`.
@@ -87,7 +105,10 @@ class DAQmxSystem(AcquisitionCard):
             max_val=voltage_range,
         )
         self.channels.append(ai_chan)
+        self.channel_names.append(ai_chan.name)
         self.actual_ranges.append(ai_chan.ai_max)
+        self.max_rate = None
+        self.reader = None
 
     def configure_clock(self, sample_rate, samples_per_chan):
         """Concrete implementation of :meth:`pymanip.aiodaq.AcquisitionCard.configure_clock`
@@ -124,48 +145,112 @@ class DAQmxSystem(AcquisitionCard):
     def start(self):
         """This method starts the task.
         """
+        with self.done_lock:
+            self.acq_done = False
         self.task.start()
         self.running = True
 
+    def _on_done(self, task_handle, status, callback_data):
+        """Done event callback. It is called from a driver thread, and wakes
+        the pending :meth:`read`, if any.
+        """
+        with self.done_lock:
+            self.acq_done = True
+            waiter = self.done_waiter
+        if waiter is not None:
+            loop, future = waiter
+            loop.call_soon_threadsafe(_wake, future)
+        return 0
+
     async def stop(self):
         """This asynchronous method aborts the current task.
         """
         async with self.stop_lock:
             if self.running:
                 self.running = False
-                while self.reading:
-                    await asyncio.sleep(1.0)
-                self.task.stop()
+                if self.done_waiter is not None:
+                    _wake(self.done_waiter[1])
+                await self.read_done.wait()
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(self.executor, self.task.stop)
 
     async def read(self, tmo=None):
         """This asynchronous method reads data from the task.
         """
+        loop = asyncio.get_running_loop()
         async with self.read_lock:
-            self.reading = True
-            done = False
-            start = time.monotonic()
-            while self.running:
+            self.read_done.clear()
+            future = loop.create_future()
+            with self.done_lock:
+                if self.acq_done or not self.running:
+                    future.set_result(None)
+                else:
+                    self.done_waiter = (loop, future)
+            try:
                 try:
-                    await self.loop.run_in_executor(
-                        None, self.task.wait_until_done, 1.0
-                    )
-                except DaqError:
-                    if tmo and time.monotonic() - start > tmo:
-                        raise TimeoutException()
-                    else:
-                        continue
-                done = True
-                break
-            if done and self.running:
-                data = await self.loop.run_in_executor(
-                    None, self.task.read, READ_ALL_AVAILABLE
-                )
-                self.last_read = time.monotonic()
-                data = np.array(data)
-            else:
-                data = None
-            self.reading = False
-            return data
+                    await asyncio.wait_for(future, tmo or None)
+                except asyncio.TimeoutError:
+                    raise TimeoutException()
+                if self.running:
+                    data = await loop.run_in_executor(self.executor, self._read_samples)
+                    self.last_read = time.monotonic()
+                else:
+                    data = None
+                return data
+            finally:
+                with self.done_lock:
+                    self.done_waiter = None
+                self.read_done.set()
+
+    def stop_blocking(self):
+        """This method aborts the current task, without an event loop.
+        """
+        if self.running:
+            self.running = False
+            self.task.stop()
+
+    def read_blocking(self, tmo=None):
+        """This method reads data from the task, blocking until the
+        acquisition is done.
+        """
+        start = time.monotonic()
+        while True:
+            try:
+                self.task.wait_until_done(1.0)
+            except DaqError:
+                if tmo and time.monotonic() - start > tmo:
+                    raise TimeoutException()
+                else:
+                    continue
+            break
+        data = self._read_samples()
+        self.last_read = time.monotonic()
+        return data
+
+    def _read_samples(self):
+        """This method reads the acquired samples with a stream reader,
+        directly into a numpy array instead of python lists (or into the
+        output file of :meth:`~pymanip.aiodaq.AcquisitionCard.read_analog`).
+        """
+        if self.reader is None:
+            self.reader = AnalogMultiChannelReader(self.task.in_stream)
+        if self.output is not None:
+            # read_analog with output file: read directly into the mapped file
+            data = self.output.reshape(len(self.channels), self.samples_per_chan)
+        else:
+            data = np.empty((len(self.channels), self.samples_per_chan))
+        self.reader.read_many_sample(data, self.samples_per_chan)
+        if len(self.channels) == 1:
+            return data[0]
+        return data
+
+
+def _wake(future):
+    """Completes the future, unless it is already done (e.g. cancelled on
+    timeout).
+    """
+    if not future.done():
+        future.set_result(None)
 
 
 def get_device_list():
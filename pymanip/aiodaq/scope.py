@@ -20,6 +20,8 @@ import time
 import warnings
 import subprocess as sp
 
+import numpy as np
+
 from niScope import Scope, SLOPE, TRIGGER_SOURCE, ScopeException
 
 from pymanip.aiodaq import TriggerConfig, AcquisitionCard, TimeoutException
@@ -37,7 +39,7 @@ try:
 except (ImportError, OSError):
     has_nisyscfg = False
 
-possible_sample_rates = [60e6 / n for n in range(4, 1201)]
+possible_sample_rates = 60e6 / np.arange(4, 1201)
 
 
 class ScopeSystem(AcquisitionCard):
@@ -56,12 +58,17 @@ class ScopeSystem(AcquisitionCard):
         else:
             self.scope = None
         self.trigger_set = False
+        # channel list argument for Fetch
+        self.channel_list = ""
+        # set when no read is in progress
+        self.read_done = asyncio.Event()
+        self.read_done.set()
 
     @property
     def samp_clk_max_rate(self):
         """Maximum rate for the board clock.
         """
-        return max(possible_sample_rates)
+        return float(possible_sample_rates[0])
 
     def possible_trigger_channels(self):
         """This method returns the list of possible channels for external triggering.
@@ -74,6 +81,7 @@ class ScopeSystem(AcquisitionCard):
         if self.scope:
             self.scope.close()
             self.scope = None
+        super().close()
 
     def add_channel(self, channel_name, terminal_config, voltage_range):
         """Concrete implementation of :meth:`pymanip.aiodaq.AcquisitionCard.add_channel`.
@@ -88,6 +96,7 @@ class ScopeSystem(AcquisitionCard):
             self.scope = Scope(scope_name)
         if cn not in self.channels:
             self.channels.append(cn)
+            self.channel_list = ",".join(self.channels)
             self.scope.ConfigureVertical(channelList=cn, voltageRange=voltage_range)
             actual_range = self.scope.ActualVoltageRange(cn)
             self.actual_ranges.append(actual_range)
@@ -100,13 +109,12 @@ class ScopeSystem(AcquisitionCard):
     def configure_clock(self, sample_rate, samples_per_chan):
         """Concrete implementation for :meth:`pymanip.aiodaq.AcquisitionCard.configure_clock`
         """
-        if sample_rate not in possible_sample_rates:
+        chosen = possible_sample_rates[
+            np.argmin(np.abs(possible_sample_rates - sample_rate))
+        ]
+        if chosen != sample_rate:
             initial_sample_rate = sample_rate
-            chosen = possible_sample_rates[0]
-            for pos in possible_sample_rates:
-                if abs(sample_rate - pos) < abs(chosen - pos):
-                    chosen = pos
-            sample_rate = chosen
+            sample_rate = float(chosen)
             warnings.warn(
                 f"{initial_sample_rate:} is not possible. "
                 f"Closest sample rate is {sample_rate:}",
@@ -167,35 +175,70 @@ class ScopeSystem(AcquisitionCard):
         """
         if self.running:
             self.running = False
-            while self.reading:
-                await asyncio.sleep(1.0)
-            self.scope.Abort()
+            await self.read_done.wait()
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self.executor, self.scope.Abort)
 
     async def read(self, tmo=None):
         """Concrete implementation for :meth:`pymanip.aiodaq.AcquisitionCard.read`
         """
-        self.reading = True
+        loop = asyncio.get_running_loop()
+        self.read_done.clear()
+        try:
+            start = time.monotonic()
+            data = None
+            while self.running:
+                try:
+                    data = await loop.run_in_executor(
+                        self.executor,
+                        self.scope.Fetch,
+                        self.channel_list,
+                        None,
+                        1.0,
+                    )
+                    break
+                except ScopeException:
+                    if tmo and time.monotonic() - start > tmo:
+                        raise TimeoutException()
+                    else:
+                        continue
+            if data is not None:
+                data = self._fetched(data)
+            return data
+        finally:
+            self.read_done.set()
+
+    def stop_blocking(self):
+        """Concrete implementation for :meth:`pymanip.aiodaq.AcquisitionCard.stop_blocking`
+        """
+        if self.running:
+            self.running = False
+            self.scope.Abort()
+
+    def read_blocking(self, tmo=None):
+        """Concrete implementation for :meth:`pymanip.aiodaq.AcquisitionCard.read_blocking`
+        """
         start = time.monotonic()
-        data = None
-        while self.running:
+        while True:
             try:
-                data = await self.loop.run_in_executor(
-                    None, self.scope.Fetch, ",".join(self.channels), None, 1.0
-                )
+                data = self.scope.Fetch(self.channel_list, None, 1.0)
                 break
             except ScopeException:
                 if tmo and time.monotonic() - start > tmo:
                     raise TimeoutException()
                 else:
                     continue
-        if data is not None:
-            self.last_read = time.monotonic()
-            if len(self.channels) > 1:
-                data = data.T
-            else:
-                data = data[:, 0]
-        self.reading = False
-        return data
+        return self._fetched(data)
+
+    def _fetched(self, data):
+        """Returns the fetched data with one contiguous row per channel, like
+        the DAQmx backend.
+        """
+        self.last_read = time.monotonic()
+        if len(self.channels) > 1:
+            return np.ascontiguousarray(data.T)
+        else:
+            return np.ascontiguousarray(data[:, 0])
 
 
 def get_device_list(daqmx_devices=None, verbose=False):
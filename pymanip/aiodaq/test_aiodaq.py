@@ -0,0 +1,75 @@
+import asyncio
+import os
+
+import numpy as np
+import pytest
+
+from pymanip.aiodaq import AcquisitionCard, TerminalConfig, TimeoutException
+
+
+class MemoryCard(AcquisitionCard):
+    """Minimal acquisition card, which returns a ramp, or times out if
+    timeout is set.
+    """
+
+    def __init__(self, timeout=False):
+        super().__init__()
+        self.timeout = timeout
+
+    def close(self):
+        super().close()
+
+    def add_channel(self, channel_name, terminal_config, voltage_range):
+        self.channels.append(channel_name)
+        self.actual_ranges.append(voltage_range)
+
+    def configure_clock(self, sample_rate, samples_per_chan):
+        self.sample_rate = sample_rate
+        self.samples_per_chan = samples_per_chan
+
+    def configure_trigger(self, trigger_source=None, trigger_level=0):
+        pass
+
+    def start(self):
+        self.running = True
+
+    async def stop(self):
+        self.running = False
+
+    async def read(self, tmo=None):
+        if self.timeout:
+            raise TimeoutException()
+        return np.arange(self.samples_per_chan, dtype=np.float64)
+
+
+def read_analog(card, *args, **kwargs):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(card.read_analog(*args, **kwargs))
+    finally:
+        loop.close()
+
+
+@pytest.mark.parametrize("sync", [True, False])
+def test_read_analog_output(tmpdir, sync):
+    """
+
+    Test that read_analog writes the data to the output file, and that
+    the output file is released, even if the acquisition times out
+
+    """
+
+    filename = os.path.join(tmpdir, "output.bin")
+    read = MemoryCard.read_analog_sync if sync else read_analog
+    # channel, terminal config, range, samples per channel and sample rate
+    args = ("ai0", TerminalConfig.RSE, -1.0, 1.0, 10, 1e3)
+    with MemoryCard() as card:
+        data = read(card, *args, output_filename=filename)
+        assert card.output is None
+        assert (data == range(10)).all()
+    assert (np.fromfile(filename) == range(10)).all()
+
+    with MemoryCard(timeout=True) as card:
+        with pytest.raises(TimeoutException):
+            read(card, *args, output_filename=filename)
+        assert card.output is None
@@ -70,7 +70,7 @@ class AsyncArduino(AsyncDriver, AcquisitionCard):
         return self
 
     def close(self):
-        pass
+        AcquisitionCard.close(self)
 
     def flush(self):
         while line := self.interface.readline().decode("ascii").strip():
@@ -122,7 +122,7 @@ class OctSession:
     def cachedvalue(self, varname):
         if self.has_cachestore:
             cprint.yellow("Retriving " + varname + " from cache")
-            return self.cachestore[varname].value
+            return self.cachestore[varname][()]
         else:
             return None
 
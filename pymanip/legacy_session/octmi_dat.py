@@ -1,59 +1,88 @@
 #! /usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import io
 import os
 import numpy as np
 
+try:
+    import pandas as pd
+
+    has_panda = True
+except ModuleNotFoundError:
+    has_panda = False
+
+
+def _read_columns(f, ncols):
+    """Lecture ligne à ligne, en une seule passe, des ncols premières colonnes
+    du fichier, ncols étant le nombre de variables du dernier en-tête. Les
+    lignes incomplètes sont complétées par NaN.
+    """
+    cols = [[] for _ in range(ncols)]
+    for line in f:
+        parts = line.split()
+        if not parts or line.startswith("T"):
+            continue
+        for i in range(ncols):
+            cols[i].append(float(parts[i]) if i < len(parts) else np.nan)
+    return np.asarray(cols, dtype=np.float64)
+
 
 def load_octmi_dat(acquisitionName, basePath="."):
-    # Vérification de l'existence du fichier
-    datFilePath = os.path.join(os.path.normpath(basePath), acquisitionName + "_MI.dat")
-    if not os.path.exists(datFilePath):
+    datFilePath = os.path.join(basePath, acquisitionName + "_MI.dat")
+
+    # Lecture en une seule fois, puis analyse du tableau numérique.
+    # Les lignes d'en-tête répétées (session réouverte) commencent par "T"
+    # et sont ignorées.
+    try:
+        f = open(datFilePath, "r")
+    except FileNotFoundError:
         print("Could not stat file", datFilePath)
         raise NameError("File does not exist")
+    with f:
+        text = f.read()
 
-    # Décompte du nombre d'éléments
-    nval = 0
-    variableList = ""
-    with open(datFilePath, "r") as f:
-        for line in f:
-            if line[0] == "T":
-                if line != variableList:
-                    variableList = line
-                    # print variableList
-            else:
-                nval = nval + 1
-
-    variableList = variableList.split(" ")
+    # Les variables sont celles du dernier en-tête (des variables ont pu
+    # être ajoutées à la réouverture de la session)
+    start = text.rfind("\nT") + 1
+    end = text.find("\n", start)
+    variableList = text[start : end if end >= 0 else None].split()
+    f = io.StringIO(text)
+    if has_panda:
+        # Le tokenizer C de pandas complète les lignes courtes par NaN,
+        # et usecols ignore les colonnes au-delà du dernier en-tête
+        data = (
+            pd.read_csv(
+                f,
+                sep=r"\s+",
+                header=None,
+                names=variableList,
+                usecols=range(len(variableList)),
+                comment="T",
+                dtype=np.float64,
+                engine="c",
+            )
+            .to_numpy()
+            .T
+        )
+    else:
+        try:
+            data = np.loadtxt(f, dtype=np.float64, comments="T", ndmin=2).T
+        except ValueError:
+            # Nombre de colonnes variable
+            f.seek(0)
+            data = _read_columns(f, len(variableList))
 
+    # Un seul tableau (nvar, nval): chaque variable est une vue contiguë
+    data = np.ascontiguousarray(data)
+    nval = data.shape[1]
     dictionnaire = dict()
     dictionnaire["nval"] = nval
-    if nval > 1:
-        for i in range(len(variableList)):
-            dictionnaire[variableList[i].strip()] = np.zeros(nval)
-
-    linenum = 0
-    with open(datFilePath, "r") as f:
-        for line in f:
-            contentList = line.split(" ")
-            if contentList[0] != "Time":
-                if nval == 1:
-                    for i in range(len(variableList)):
-                        dictionnaire[variableList[i].strip()] = eval(
-                            contentList[i].strip()
-                        )
-                else:
-                    for i in range(len(variableList)):
-                        if i < len(contentList):
-                            dataStr = contentList[i].strip()
-                            if dataStr.lower() == "nan":
-                                dictionnaire[variableList[i].strip()][linenum] = np.nan
-                            else:
-                                dictionnaire[variableList[i].strip()][linenum] = eval(
-                                    contentList[i].strip()
-                                )
-                        else:
-                            dictionnaire[variableList[i].strip()][linenum] = np.nan
-                    linenum = linenum + 1
+    if nval == 1:
+        for i, varname in enumerate(variableList):
+            dictionnaire[varname] = data[i, 0]
+    elif nval > 1:
+        for i, varname in enumerate(variableList):
+            dictionnaire[varname] = data[i]
 
     return dictionnaire
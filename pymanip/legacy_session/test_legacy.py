@@ -1,8 +1,10 @@
 from importlib.resources import files, as_file
 
 import numpy as np
+import pytest
 
 from pymanip.legacy_session.octmi_binary import read_octave_binary, read_OctMI_session
+import pymanip.legacy_session.octmi_dat as octmi_dat
 from pymanip.legacy_session.octmi_dat import load_octmi_dat
 import pymanip.legacy_session.example as example
 
@@ -70,3 +72,26 @@ def test_octmi_dat():
     assert data["nval"] == 51
     assert np.isclose(data["A"], np.arange(0.0, 5.1, 0.1)).all()
     assert np.isclose(data["B"], np.cos(data["A"]), rtol=1e-4).all()
+
+
+@pytest.mark.parametrize("has_panda", [True, False])
+def test_octmi_dat_new_header(tmpdir, monkeypatch, has_panda):
+    """
+
+    Test reading a dat file whose header changes when the session is
+    reopened with an additional variable, with and without pandas.
+
+    """
+
+    if has_panda:
+        pytest.importorskip("pandas")
+    monkeypatch.setattr(octmi_dat, "has_panda", has_panda)
+    with open(tmpdir / "essai3_MI.dat", "w") as f:
+        f.write("Time a\n1 2\n3 4\nTime a b\n5 6 7\n8 9 10\n")
+    data = load_octmi_dat("essai3", str(tmpdir))
+
+    assert data["nval"] == 4
+    assert (data["Time"] == [1, 3, 5, 8]).all()
+    assert (data["a"] == [2, 4, 6, 9]).all()
+    assert np.isnan(data["b"][:2]).all()
+    assert (data["b"][2:] == [7, 10]).all()
@@ -18,14 +18,13 @@ which are roughly in RFC 3339 format.
 """
 
 import datetime
-from time import time
+from time import time, sleep as time_sleep
 import sys
 import warnings
 from platform import platform
 import dateutil.parser
 from dateutil.tz import tzutc, tzlocal
 import matplotlib.pyplot as plt
-import six
 
 if platform().startswith("Windows"):
     dateformat = "%A %d %B %Y - %X (%z)"
@@ -41,33 +40,29 @@ def sleep(duration):
     :param duration: the duration for which to sleep
     :type duration: float
     """
-    debut = time()
-    while (time() - debut) < duration:
-        if six.PY2:
-            sys.stdout.write(
-                (
-                    "Sleeping for "
-                    + str(-int(time() - debut - duration))
-                    + " s"
-                    + " " * 35
-                    + "\r"
-                ).encode("utf-8")
-            )
+    end = time() + duration
+    if sys.stdout is None:
+        # no console to print the timer to (e.g. pythonw)
+        time_sleep(duration)
+        return
+    shown = None
+    while True:
+        remaining = end - time()
+        if remaining <= 0:
+            break
+        # the timer line is only rewritten when the displayed value changes
+        # (and flushed, since it does not end with a newline)
+        if int(remaining) != shown:
+            shown = int(remaining)
+            sys.stdout.write("Sleeping for " + str(shown) + " s" + " " * 35 + "\r")
+            sys.stdout.flush()
+        if plt.get_fignums():
+            # keep the figures responsive
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                plt.pause(min(1.0, remaining))
         else:
-            sys.stdout.write(
-                (
-                    "Sleeping for "
-                    + str(-int(time() - debut - duration))
-                    + " s"
-                    + " " * 35
-                    + "\r"
-                )
-            )
-        sys.stdout.flush()
-        # time.sleep(1.0)
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore")
-            plt.pause(1.0)
+            time_sleep(min(1.0, remaining))
     sys.stdout.write("\n")
 
 
@@ -6,20 +6,24 @@ Useful classes are Session and SavedSession.
 """
 
 import os
+import sys
 from pathlib import Path
 import time
-import inspect
+import operator
 from datetime import datetime
+from functools import lru_cache
 import warnings
+import weakref
 
 import numpy as np
 import matplotlib.pyplot as plt
 import h5py
 
 import smtplib
-import base64
-import quopri
-import tempfile
+from email.message import EmailMessage
+from concurrent.futures import ThreadPoolExecutor
+import zlib
+import io
 
 from fluiddyn.util.terminal_colors import cprint
 
@@ -32,6 +36,15 @@ except ImportError:
         return itertools.cycle(["b", "r", "g", "k", "m", "c"])
 
 
+try:
+    # registers the Blosc filter in HDF5, which is needed to read back
+    # sessions logged with compression="blosc"
+    import hdf5plugin
+
+    has_hdf5plugin = True
+except ImportError:
+    has_hdf5plugin = False
+
 import pymanip.mytime as mytime
 from pymanip.mytime import dateformat
 
@@ -75,7 +88,110 @@ def makeAcqName(comment=None):
     return next(defaultGenerator)
 
 
+@lru_cache(maxsize=512)
+def _format_timestamp(t):
+    """Formats a timestamp with dateformat. Results are cached because the
+    same timestamps (parameters, first and last points) are formatted again
+    on each describe or reload.
+    """
+    return time.strftime(dateformat, time.localtime(t))
+
+
+def _optimal_chunk(dtype, chunk_nbytes=32 << 10):
+    """Returns the length of 1D chunks of about chunk_nbytes bytes
+    (32 KiB by default), and at least 1024 elements.
+    """
+    return max(1024, chunk_nbytes // np.dtype(dtype).itemsize)
+
+
+def _report_email_error(future):
+    """Prints the unexpected error raised while sending an email from the
+    background thread, if any.
+    """
+    e = future.exception()
+    if e is not None:
+        cprint.red("Error while sending email: " + repr(e))
+
+
+def _check_filters(dsets):
+    """Raises RuntimeError if the data of one of dsets cannot be decoded,
+    because it uses a filter which is not available in HDF5.
+    """
+    for dset in dsets:
+        plist = dset.id.get_create_plist()
+        for i in range(plist.get_nfilters()):
+            code, flags, values, name = plist.get_filter(i)
+            if not h5py.h5z.filter_avail(code):
+                raise RuntimeError(
+                    "Dataset "
+                    + dset.name
+                    + " uses the unavailable HDF5 filter "
+                    + str(code)
+                    + " (Blosc requires hdf5plugin)"
+                )
+
+
+def _direct_chunks_supported(dset):
+    """Whether chunks of dset can be encoded by :func:`_filtered_chunk`."""
+    if (
+        dset.chunks is None
+        or len(dset.chunks) != 1
+        or dset.dtype.kind not in "biuf"
+        or dset.compression not in (None, "gzip")
+    ):
+        return False
+    # filters unknown to h5py (e.g. Blosc) are not reported by
+    # dset.compression, so the whole pipeline is checked
+    nfilters = dset.id.get_create_plist().get_nfilters()
+    return nfilters == int(dset.shuffle) + int(dset.compression == "gzip")
+
+
+def _filtered_chunk(dset, data):
+    """Returns the bytes of a chunk of dset holding data, which has the dtype
+    of dset, encoded with the filters of dset.
+    """
+    data = np.ascontiguousarray(data)
+    if dset.shuffle:
+        # byte shuffle: first bytes of all the values, then second bytes, etc.
+        chunk = data.view(np.uint8).reshape(-1, data.itemsize).T.tobytes()
+    else:
+        chunk = data.tobytes()
+    if dset.compression == "gzip":
+        chunk = zlib.compress(chunk, dset.compression_opts)
+    return chunk
+
+
+def _write_rows(dset, start, data):
+    """Writes data to the 1D dataset dset from index start. Whole aligned
+    chunks are written directly, bypassing the HDF5 selection machinery,
+    the other values are written normally. Data of another dtype than dset
+    is always converted by HDF5 (which saturates out of range values), so
+    that the stored values do not depend on the chunk alignment.
+    """
+    n = len(data)
+    done = 0
+    if data.ndim == 1 and data.dtype == dset.dtype and _direct_chunks_supported(dset):
+        c = dset.chunks[0]
+        first = min(n, -start % c)
+        last = first + (n - first) // c * c
+        if last > first:
+            if first > 0:
+                dset[start : start + first] = data[:first]
+            for i in range(first, last, c):
+                dset.id.write_direct_chunk(
+                    (start + i,), _filtered_chunk(dset, data[i : i + c])
+                )
+            done = last
+    if done < n:
+        dset[start + done : start + n] = data[done:]
+
+
 class BaseSession:
+    # size of the HDF5 chunk cache: it must hold the last chunk of every
+    # logged dataset, and the default (1 MiB) is too small for many variables
+    rdcc_nbytes = 16 << 20
+    rdcc_nslots = 10007
+
     def __init__(self, session_name=None):
         if session_name is None:
             session_name = makeAcqName()
@@ -96,12 +212,27 @@ class BaseSession:
     def __str__(self):
         return self.session_name
 
+    def _cache_variables(self):
+        """Caches the logged variable names and dataset handles, to avoid
+        enumerating the HDF5 group on each logged line or query.
+        """
+        self._var_names = tuple(self.grp_variables.keys())
+        self._var_dsets = tuple(self.grp_variables[var] for var in self._var_names)
+        self._var_datasets = dict(zip(self._var_names, self._var_dsets))
+
+    def _flush_buffers(self):
+        """Writes pending logged lines to the HDF5 store, if any.
+        Read-only sessions have nothing to flush.
+        """
+        pass
+
     def describe(self):
+        self._flush_buffers()
         # Logged variables
-        if len(self.grp_variables.keys()) > 0:
+        if len(self._var_names) > 0:
             num_lines = self.dset_time.len()
             print("List of saved variables: (%d lines)" % num_lines)
-            for var in self.grp_variables.keys():
+            for var in self._var_names:
                 print(" " + var)
         # Datasets
         if self.grp_datasets_defined:
@@ -119,8 +250,22 @@ class BaseSession:
                     if isinstance(value, np.ndarray) and len(value) == 1:
                         value = value[0]
                     if name == "email_lastSent":
-                        theDateStr = time.strftime(dateformat, time.localtime(value))
+                        theDateStr = _format_timestamp(float(value))
                         print(" " + name + " = " + theDateStr)
+                    elif isinstance(value, np.ndarray):
+                        # only the first and last values of large arrays
+                        preview = np.array2string(value, threshold=8, edgeitems=2)
+                        print(
+                            " "
+                            + name
+                            + " = "
+                            + preview
+                            + " (ndarray"
+                            + str(value.shape)
+                            + " "
+                            + str(value.dtype)
+                            + ")"
+                        )
                     else:
                         print(
                             " "
@@ -160,26 +305,47 @@ class BaseSession:
     def has_log(self, name):
         if name == "Time" or name == "time" or name == "t":
             return True
-        return name in self.grp_variables.keys()
+        return name in self._var_datasets
 
     def log_variable_list(self):
-        return self.grp_variables.keys()
+        return self._var_names
 
     def log(self, varname):
         if self.opened:
+            self._flush_buffers()
             if varname == "Time" or varname == "time" or varname == "t":
                 return self.dset_time[()]
             elif varname == "?":
                 print("List of saved variables:")
-                for var in self.grp_variables.keys():
+                for var in self._var_names:
                     print(var)
-            elif varname in self.grp_variables.keys():
-                return self.grp_variables[varname][()]
+            elif varname in self._var_datasets:
+                return self._var_datasets[varname][()]
             else:
                 cprint.red("Variable is not defined: " + varname)
         else:
             cprint.red("Session is not opened")
 
+    def _log_dataset(self, varname):
+        if varname == "Time" or varname == "time" or varname == "t":
+            return self.dset_time
+        return self._var_datasets[varname]
+
+    def _log_slice(self, varname, a, b):
+        """Returns the values a to b of a logged variable, read with a
+        single HDF5 selection.
+        """
+        self._flush_buffers()
+        return self._log_dataset(varname)[a:b]
+
+    def log_tail(self, varname, n):
+        """Returns the last n values of a logged variable. Only these
+        values are read from the HDF5 file.
+        """
+        self._flush_buffers()
+        size = self.dset_time.len()
+        return self._log_slice(varname, max(0, size - n), size)
+
     def __getitem__(self, key):
         if self.has_log(key):
             return self.log(key)
@@ -196,29 +362,29 @@ class BaseSession:
             plt.clf()
             plt.ion()
             plt.show()
-            t = self.log("t")
-            if len(t) > maxvalues:
-                debut = len(t) - 1000
-                fin = len(t)
-            else:
-                debut = 0
-                fin = len(t)
-            if t[debut] > self.session_opening_time:
+            # only the last maxvalues points are read from the file,
+            # indices below are relative to that window
+            self._flush_buffers()
+            n = self.dset_time.len()
+            debut = max(0, n - maxvalues)
+            t = self._log_slice("t", debut, n)
+            fin = n - debut
+            if t[0] > self.session_opening_time:
                 # tous les points sont nouveaux
                 olddebut = None
                 oldfin = None
-                newdebut = debut
+                newdebut = 0
                 newfin = fin
             elif t[-1] > self.session_opening_time:
                 # certains points sont nouveaux
                 bb = t > self.session_opening_time
-                olddebut = debut
-                oldfin = np.min(bb.argmax())
+                olddebut = 0
+                oldfin = bb.argmax()
                 newdebut = oldfin
                 newfin = fin
             else:
                 # les points sont tous anciens
-                olddebut = debut
+                olddebut = 0
                 oldfin = fin
                 newdebut = None
                 newfin = None
@@ -233,10 +399,11 @@ class BaseSession:
             if isinstance(varlist, str):
                 lab = varlist
                 col = (0, 0, 1)
+                y = self._log_slice(varlist, debut, n)
                 if newdebut is not None:
                     plt.plot(
                         t[newdebut:newfin],
-                        self.log(varlist)[newdebut:newfin],
+                        y[newdebut:newfin],
                         "o-",
                         color=col,
                         mec=col,
@@ -247,7 +414,7 @@ class BaseSession:
                 if olddebut is not None:
                     plt.plot(
                         t[olddebut:oldfin],
-                        self.log(varlist)[olddebut:oldfin],
+                        y[olddebut:oldfin],
                         "o-",
                         mfc="none",
                         mec=col,
@@ -258,10 +425,11 @@ class BaseSession:
             else:
                 for var, coul in zip(varlist, ColorGenerator()):
                     lab = var
+                    y = self._log_slice(var, debut, n)
                     if newdebut is not None:
                         plotfunc(
                             t[newdebut:newfin],
-                            self.log(var)[newdebut:newfin],
+                            y[newdebut:newfin],
                             "o-",
                             mfc=coul,
                             mec=coul,
@@ -272,7 +440,7 @@ class BaseSession:
                     if olddebut is not None:
                         plotfunc(
                             t[olddebut:oldfin],
-                            self.log(var)[olddebut:oldfin],
+                            y[olddebut:oldfin],
                             "o-",
                             mfc="none",
                             mec=coul,
@@ -363,11 +531,7 @@ class SavedSession(BaseSession):
 
     def cache(self, name, dict_caller=None):
         if dict_caller is None:
-            stack = inspect.stack()
-            try:
-                dict_caller = stack[1][0].f_locals
-            finally:
-                del stack
+            dict_caller = sys._getframe(1).f_locals
         if not isinstance(name, str):
             for var in name:
                 self.cache(var, dict_caller)
@@ -429,13 +593,20 @@ class SavedSession(BaseSession):
                         self.cachestore[name][:] = dict_caller[name]
 
     def __enter__(self):
-        self.store = h5py.File(self.storename, "r")
+        self.store = h5py.File(
+            self.storename,
+            "r",
+            rdcc_nbytes=self.rdcc_nbytes,
+            rdcc_nslots=self.rdcc_nslots,
+        )
         try:
             self.dset_time = self.store["time"]
         except KeyError:
             print("The file '" + self.storename + "' is not a pymanip session file.")
             raise RuntimeError("Wrong hdf5 data")
         self.grp_variables = self.store["variables"]
+        self._cache_variables()
+        _check_filters((self.dset_time,) + self._var_dsets)
         try:
             self.parameters = self.store.attrs
             self.parameters_defined = True
@@ -455,8 +626,8 @@ class SavedSession(BaseSession):
         if total_size > 0:
             start_t = self.dset_time[0]
             end_t = self.dset_time[total_size - 1]
-            start_string = time.strftime(dateformat, time.localtime(start_t))
-            end_string = time.strftime(dateformat, time.localtime(end_t))
+            start_string = _format_timestamp(start_t)
+            end_string = _format_timestamp(end_t)
             if self.verbose:
                 cprint.blue("*** Start date: " + start_string)
                 cprint.blue("***   End date: " + end_string)
@@ -464,9 +635,7 @@ class SavedSession(BaseSession):
             if self.verbose:
                 cprint.red("No logged variables")
         if self.grp_datasets_defined:
-            timestamp_string = time.strftime(
-                dateformat, time.localtime(self.grp_datasets.attrs["timestamp"])
-            )
+            timestamp_string = _format_timestamp(self.grp_datasets.attrs["timestamp"])
             if self.verbose:
                 cprint.blue("*** Acquisition timestamp " + timestamp_string)
 
@@ -499,23 +668,96 @@ class SavedSession(BaseSession):
 
 
 class Session(BaseSession):
-    def __init__(self, session_name, variable_list=[], allow_override_datasets=False):
+    # chunk length of the logged variables: small chunks are cheap to
+    # rewrite when partial buffers are flushed, and many of them fit in
+    # the chunk cache
+    log_chunk_size = _optimal_chunk(np.float64)
+    # size in bytes of the lines kept in memory before being appended to the
+    # HDF5 store. The number of lines, log_buffer_size, is rounded up to a
+    # multiple of the chunk length.
+    log_buffer_nbytes = 1 << 20
+    # file format versions bounds: HDF5 >= 1.10 indexes growable chunked
+    # datasets more efficiently than the default (earliest) format
+    libver = ("v110", "latest")
+    # maximum delay (in seconds) before logged lines and messages are
+    # flushed to the HDF5 store and to the dat and log files
+    flush_interval = 5.0
+    # filters of the logged datasets: floating point time series compress
+    # well once shuffled, and gzip is available in every HDF5 build
+    log_filters = {"compression": "gzip", "compression_opts": 4, "shuffle": True}
+
+    def __init__(
+        self,
+        session_name,
+        variable_list=[],
+        allow_override_datasets=False,
+        compression="gzip",
+    ):
+        if compression == "blosc":
+            if not has_hdf5plugin:
+                raise ImportError("Blosc compression requires hdf5plugin")
+            self.log_filters = dict(
+                hdf5plugin.Blosc(
+                    cname="lz4", clevel=5, shuffle=hdf5plugin.Blosc.SHUFFLE
+                )
+            )
+        elif compression is None:
+            self.log_filters = dict()
+            # unfiltered chunks are allocated whole, even when almost empty
+            self.log_chunk_size = _optimal_chunk(np.float64, chunk_nbytes=8 << 10)
+        elif compression != "gzip":
+            raise ValueError("Unknown compression " + str(compression))
         super(Session, self).__init__(session_name)
+        # needed by Stop, which __del__ calls even if the store fails to open
+        self.email_started = False
+        self._smtp = None
+        self._smtp_server = None
+        self._io_pool = None
         self.datname = self.session_name + ".dat"
         self.logname = self.session_name + ".log"
-        self.datfile = open(self.datname, "a")
-        self.logfile = open(self.logname, "a")
+        # binary files with a large buffer: lines are encoded once and
+        # only hit the disk when the HDF5 store is flushed
+        self.datfile = open(self.datname, "ab", buffering=1 << 20)
+        self.logfile = open(self.logname, "ab", buffering=1 << 20)
         self.allow_override_datasets = allow_override_datasets
+        # variables are given by name (stored as float64), or as
+        # (name, dtype) tuples to store them with a smaller type
+        variable_dtypes = dict()
+        for var in variable_list:
+            if isinstance(var, tuple):
+                variable_dtypes[var[0]] = var[1]
+            else:
+                variable_dtypes[var] = float
 
-        date_string = time.strftime(
-            dateformat, time.localtime(self.session_opening_time)
-        )
-        self.logfile.write("Session opened on " + date_string)
+        date_string = _format_timestamp(self.session_opening_time)
+        self.logfile.write(("Session opened on " + date_string).encode("utf-8"))
         self.logfile.flush()
+        self._last_flush = time.monotonic()
         try:
-            self.store = h5py.File(self.storename, "r+")
+            self.store = h5py.File(
+                self.storename,
+                "r+",
+                libver=self.libver,
+                rdcc_nbytes=self.rdcc_nbytes,
+                rdcc_nslots=self.rdcc_nslots,
+            )
+            reopened = True
+        except IOError:
+            self.store = h5py.File(
+                self.storename,
+                "w",
+                libver=self.libver,
+                rdcc_nbytes=self.rdcc_nbytes,
+                rdcc_nslots=self.rdcc_nslots,
+            )
+            reopened = False
+        if reopened:
             self.dset_time = self.store["time"]
             self.grp_variables = self.store["variables"]
+            _check_filters((self.dset_time,) + tuple(self.grp_variables.values()))
+            if self.dset_time.chunks is not None:
+                # keep the chunk length of the existing datasets
+                self.log_chunk_size = self.dset_time.chunks[0]
             self.parameters = self.store.attrs
             self.parameters_defined = True
             try:
@@ -524,82 +766,162 @@ class Session(BaseSession):
             except Exception:
                 self.grp_datasets_defined = False
             original_size = self.dset_time.len()
-            arr = np.zeros((original_size,))
             new_headers = False
-            if len(variable_list) != len(self.grp_variables.keys()):
+            existing_vars = set(self.grp_variables.keys())
+            if len(variable_dtypes) != len(existing_vars):
                 new_headers = True
-            for var in variable_list:
-                if var not in self.grp_variables.keys():
+            for var, dtype in variable_dtypes.items():
+                if var not in existing_vars:
                     self.grp_variables.create_dataset(
-                        var, chunks=True, maxshape=(None,), data=arr
+                        var,
+                        chunks=(self.log_chunk_size,),
+                        maxshape=(None,),
+                        data=np.zeros((original_size,), dtype=dtype),
+                        **self.log_filters,
                     )
                     new_headers = True
             cprint.blue("Session reloaded from file", bold=True, end=" ")
             cprint.blue(self.storename)
             if original_size > 0:
                 last_t = self.dset_time[original_size - 1]
-                date_string = time.strftime(dateformat, time.localtime(last_t))
+                date_string = _format_timestamp(last_t)
                 cprint.black("Last point recorded:", bold=True, end=" ")
                 print(date_string)
-        except IOError:
-            self.store = h5py.File(self.storename, "w")
+        else:
             self.dset_time = self.store.create_dataset(
-                "time", chunks=True, maxshape=(None,), shape=(0,), dtype=float
+                "time",
+                chunks=(self.log_chunk_size,),
+                maxshape=(None,),
+                shape=(0,),
+                dtype=float,
+                **self.log_filters,
             )
             self.grp_variables = self.store.create_group("variables")
             self.parameters = self.store.attrs
             self.parameters_defined = True
             self.parameters["email_lastSent"] = 0.0
             new_headers = True
-            for var in variable_list:
+            for var, dtype in variable_dtypes.items():
                 self.grp_variables.create_dataset(
-                    var, chunks=True, maxshape=(None,), shape=(0,), dtype=float
+                    var,
+                    chunks=(self.log_chunk_size,),
+                    maxshape=(None,),
+                    shape=(0,),
+                    dtype=dtype,
+                    **self.log_filters,
                 )
+        self._cache_variables()
         if new_headers:
-            self.datfile.write("Time")
             # attention: ne pas utiliser variable_list ici car
-            # dans log_addline on utilise self.grp_variable.keys()
+            # dans log_addline on utilise self._var_names
             # et l'ordre n'est pas le même
-            for var in self.grp_variables.keys():
-                self.datfile.write(" " + var)
-            self.datfile.write("\n")
+            header = " ".join(("Time",) + self._var_names) + "\n"
+            self.datfile.write(header.encode("utf-8"))
+        # whole buffers end on chunk boundaries
+        c = self.log_chunk_size
+        lines = self.log_buffer_nbytes // (8 * (len(self._var_names) + 1))
+        self.log_buffer_size = max(1, -(-lines // c)) * c
+        self._buf_time = np.empty((self.log_buffer_size,))
+        # reads the values of all the variables from the caller locals
+        # with a single C-level call
+        if len(self._var_names) > 0:
+            self._var_getter = operator.itemgetter(*self._var_names)
+        else:
+            self._var_getter = lambda dict_caller: ()
+        # one row per buffered line, one column per variable
+        self._buf_values = np.empty((self.log_buffer_size, len(self._var_names)))
+        self._buf_n = 0
+        # number of buffered lines already written to the dat file
+        self._dat_start = 0
+        # the first flush completes the last chunk of a reopened file,
+        # so that the following ones write whole chunks
+        self._buf_limit = self.log_buffer_size - (
+            self.dset_time.len() % self.log_chunk_size
+        )
         self.opened = True
-        self.email_started = False
+        # PNG renderings of the emailed figures, dropped with the figures
+        self._fig_png_cache = weakref.WeakKeyDictionary()
 
     def disp(self, texte):
         print(texte)
         if self.email_started:
-            self.email_body = self.email_body + texte + "<br />\n"
+            self._email_parts.append(texte + "<br />\n")
         if not texte.endswith("\n"):
             texte = texte + "\n"
-        self.logfile.write(texte)
-        self.logfile.flush()
+        self.logfile.write(texte.encode("utf-8"))
+        self._flush_files()
+
+    def _flush_files(self):
+        """Flushes the buffered lines to the HDF5 store, and the dat and log
+        files, if they have not been flushed for more than
+        :attr:`flush_interval` seconds.
+        """
+        now = time.monotonic()
+        if now - self._last_flush > self.flush_interval:
+            self._flush_buffers()
+            self.logfile.flush()
+            self.datfile.flush()
+            self._last_flush = now
 
     def log_addline(self, timestamp=None, dict_caller=None):
-        if not dict_caller:
-            stack = inspect.stack()
-            try:
-                dict_caller = stack[1][0].f_locals
-            finally:
-                del stack
-        newsize = self.dset_time.len() + 1
-        self.dset_time.resize((newsize,))
+        if dict_caller is None:
+            dict_caller = sys._getframe(1).f_locals
         if not timestamp:
             timestamp = time.time()
-        self.dset_time[newsize - 1] = timestamp
-        self.datfile.write("%f" % self.dset_time[newsize - 1])
-        for varname in self.grp_variables.keys():
-            d = self.grp_variables[varname]
-            d.resize((newsize,))
-            try:
-                d[newsize - 1] = dict_caller[varname]
-                self.datfile.write(" %f" % dict_caller[varname])
-            except Exception:
-                cprint.red("Variable is not defined: " + varname)
-                d[newsize - 1] = 0.0
-        self.datfile.write("\n")
-        self.datfile.flush()
+        n = self._buf_n
+        self._buf_time[n] = timestamp
+        try:
+            # all the variables are stored with a single row assignment
+            self._buf_values[n] = self._var_getter(dict_caller)
+        except Exception:
+            line = ["%f" % timestamp]
+            for j, varname in enumerate(self._var_names):
+                try:
+                    self._buf_values[n, j] = dict_caller[varname]
+                    line.append("%f" % dict_caller[varname])
+                except Exception:
+                    cprint.red("Variable is not defined: " + varname)
+                    self._buf_values[n, j] = 0.0
+            # undefined variables are left out of the dat line
+            self._write_dat()
+            self.datfile.write((" ".join(line) + "\n").encode("ascii"))
+            self._dat_start = n + 1
+        self._buf_n = n + 1
+        if self._buf_n == self._buf_limit:
+            self._flush_buffers()
+        else:
+            self._flush_files()
+
+    def _write_dat(self):
+        """Writes the buffered lines which are not yet in the dat file."""
+        start, n = self._dat_start, self._buf_n
+        if n > start:
+            np.savetxt(
+                self.datfile,
+                np.column_stack((self._buf_time[start:n], self._buf_values[start:n])),
+                fmt="%f",
+            )
+            self._dat_start = n
+
+    def _flush_buffers(self):
+        """Appends the lines buffered by :meth:`log_addline` to the HDF5
+        datasets, with one resize per dataset, and flushes the store.
+        """
+        n = self._buf_n
+        if n == 0:
+            return
+        self._write_dat()
+        size = self.dset_time.len()
+        self.dset_time.resize((size + n,))
+        _write_rows(self.dset_time, size, self._buf_time[:n])
+        for j, d in enumerate(self._var_dsets):
+            d.resize((size + n,))
+            _write_rows(d, size, self._buf_values[:n, j])
+        self._buf_n = 0
+        self._dat_start = 0
+        self._buf_limit = self.log_buffer_size - ((size + n) % self.log_chunk_size)
         self.store.flush()
+        self.datfile.flush()
 
     def save_remote_data(self, data):
         """
@@ -628,11 +950,7 @@ class Session(BaseSession):
 
     def save_parameter(self, parameter_name, dict_caller=None):
         if dict_caller is None:
-            stack = inspect.stack()
-            try:
-                dict_caller = stack[1][0].f_locals
-            finally:
-                del stack
+            dict_caller = sys._getframe(1).f_locals
         if isinstance(parameter_name, str):
             try:
                 value = dict_caller[parameter_name]
@@ -661,33 +979,41 @@ class Session(BaseSession):
             for k, v in parameter_list.items():
                 self.parameters[k] = v
         else:
-            stack = inspect.stack()
-            try:
-                dict_caller = stack[1][0].f_locals
-            finally:
-                del stack
+            dict_caller = sys._getframe(1).f_locals
             self.save_parameter(parameter_list, dict_caller)
 
     def save_dataset(self, data_name, dict_caller=None):
         if dict_caller is None:
-            stack = inspect.stack()
-            try:
-                dict_caller = stack[1][0].f_locals
-            finally:
-                del stack
+            dict_caller = sys._getframe(1).f_locals
         if not self.grp_datasets_defined:
             self.grp_datasets = self.store.create_group("datasets")
             self.grp_datasets_defined = True
         if data_name not in self.grp_datasets.keys():
             self.grp_datasets.attrs["timestamp"] = time.time()
-            self.grp_datasets.create_dataset(
-                data_name, chunks=True, maxshape=(None,), data=dict_caller[data_name]
-            )
+            data = np.asarray(dict_caller[data_name])
+            if data.ndim == 1 and data.dtype.kind in "biuf":
+                dset = self.grp_datasets.create_dataset(
+                    data_name,
+                    chunks=True,
+                    maxshape=(None,),
+                    shape=data.shape,
+                    dtype=data.dtype,
+                )
+                _write_rows(dset, 0, data)
+            else:
+                self.grp_datasets.create_dataset(
+                    data_name,
+                    chunks=True,
+                    maxshape=(None,),
+                    data=dict_caller[data_name],
+                )
         elif self.allow_override_datasets:
             new_length = len(dict_caller[data_name])
             if len(self.grp_datasets[data_name]) != new_length:
                 self.grp_datasets[data_name].resize((new_length,))
-            self.grp_datasets[data_name][:] = dict_caller[data_name]
+            _write_rows(
+                self.grp_datasets[data_name], 0, np.asarray(dict_caller[data_name])
+            )
             self.grp_datasets.attrs["timestamp"] = time.time()
             cprint.red("Warning: overriding existing dataset")
         else:
@@ -696,11 +1022,7 @@ class Session(BaseSession):
             )
 
     def save_datasets(self, data_list):
-        stack = inspect.stack()
-        try:
-            dict_caller = stack[1][0].f_locals
-        finally:
-            del stack
+        dict_caller = sys._getframe(1).f_locals
         for data_name in data_list:
             self.save_dataset(data_name, dict_caller)
 
@@ -709,147 +1031,167 @@ class Session(BaseSession):
         self.email_port = port
         self.email_from_addr = from_addr
         self.email_to_addrs = to_addrs
-        date_string = time.strftime(dateformat, time.localtime(time.time()))
+        date_string = time.strftime(dateformat)
         if subject is not None:
             self.email_subject = subject
         else:
             self.email_subject = self.session_name
-        self.email_body = (
+        # the body is accumulated in a list and joined in stop_email
+        self._email_parts = [
             "<html><body>\n<strong>**************************************************</strong><br />\n<strong>"
             + date_string
             + "</strong><br />\n"
             + self.session_name
             + "<br />\n<strong>**************************************************</strong><br /><br />\n\n"
-        )
+        ]
         self.email_figlist = []
         self.email_started = True
 
     def add_figure_to_email(self, figNum):
         self.email_figlist.append(figNum)
 
-    def stop_email(self):
+    def _figure_png(self, figNum):
+        """Returns the PNG rendering of figure figNum. The rendering of the
+        previous email is reused if the figure has not been modified since.
+        """
+        fig = plt.figure(figNum)
+        cache = self._fig_png_cache
+        if fig not in cache:
+            # any modification of the figure goes through its stale_callback
+            previous_callback = fig.stale_callback
+
+            def invalidate(artist, val):
+                cache[artist] = None
+                if previous_callback is not None:
+                    previous_callback(artist, val)
+
+            fig.stale_callback = invalidate
+        elif cache[fig] is not None:
+            return cache[fig]
+        png = io.BytesIO()
+        fig.savefig(png, format="png")
+        cache[fig] = png.getvalue()
+        return cache[fig]
+
+    def _smtp_connection(self, host, port):
+        """Returns the SMTP connection, opened on first use and kept
+        open between emails.
+        """
+        if self._smtp is not None and self._smtp_server != (host, port):
+            self._smtp_close()
+        if self._smtp is not None:
+            # the server may have closed the connection since the last email
+            try:
+                alive = self._smtp.noop()[0] == 250
+            except (smtplib.SMTPServerDisconnected, OSError):
+                alive = False
+            if not alive:
+                self._smtp.close()
+                self._smtp = None
+        if self._smtp is None:
+            self._smtp = smtplib.SMTP(host, port)
+            self._smtp_server = (host, port)
+        return self._smtp
+
+    def _smtp_close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except smtplib.SMTPServerDisconnected:
+                pass
+            finally:
+                self._smtp.close()
+                self._smtp = None
+                self._smtp_server = None
+
+    def _send_email(self, host, port, from_addr, to_addrs, msg, queued, previous):
         success = False
-        smtp = smtplib.SMTP(self.email_host, self.email_port)
-        self.email_body = self.email_body + "</body></html>"
+        try:
+            error_list = self._smtp_connection(host, port).send_message(
+                msg, from_addr, to_addrs
+            )
+            if len(error_list) == 0:
+                success = True
+        except smtplib.SMTPHeloError:
+            print("SMTP Helo Error")
+            pass
+        except smtplib.SMTPRecipientsRefused:
+            print("Some recipients have been rejected by SMTP server")
+            pass
+        except smtplib.SMTPSenderRefused:
+            print("SMTP server refused sender " + from_addr)
+            pass
+        except smtplib.SMTPDataError:
+            print("SMTP Data Error")
+            pass
+        except (smtplib.SMTPException, OSError) as e:
+            print("Could not send email:", e)
+            if self._smtp is not None:
+                self._smtp.close()
+                self._smtp = None
+        except Exception as e:
+            print("Could not send email:", repr(e))
+        if success:
+            date_string = time.strftime(dateformat)
+            print(date_string + ": Email successfully sent.")
+        elif self.parameters["email_lastSent"] == queued:
+            # restores the time of the previous email, unless another
+            # email has been queued since
+            self.parameters["email_lastSent"] = previous
 
-        useMime = False
-        if len(self.email_figlist) > 0:
-            useMime = True
+    def stop_email(self):
+        self._email_parts.append("</body></html>")
+        self.email_body = "".join(self._email_parts)
 
-        mime_boundary = "pymanip-MIME-delimiter"
-        if useMime:
-            email_header = (
-                'Content-type: multipart/mixed; boundary="' + mime_boundary + '"\n'
-            )
-            email_header = email_header + "MIME-version: 1.0\n"
-        else:
-            email_header = "Content-Type: text/html\n"
-            email_header = (
-                email_header + "Content-Transfer-Encoding: quoted-printable\n"
-            )
-        email_header = email_header + "User-Agent: pymanip\n"
-        email_header = email_header + "To: "
+        msg = EmailMessage()
+        msg["From"] = self.email_from_addr
         if isinstance(self.email_to_addrs, str):
-            email_header = email_header + self.email_to_addrs + "\n"
+            msg["To"] = self.email_to_addrs
         elif isinstance(self.email_to_addrs, tuple):
-            for addr in self.email_to_addrs[:-1]:
-                email_header = email_header + addr + ", "
-            email_header = email_header + self.email_to_addrs[-1] + "\n"
+            msg["To"] = ", ".join(self.email_to_addrs)
         else:
             raise ValueError("Adress list should be a string or a tuple")
-        email_header = email_header + "Subject: " + self.email_subject
-
-        if useMime:
-            body = "This is a multi-part message in MIME format.\n"
-            # Add text/html MIME part
-            body = body + "--" + mime_boundary + "\n"
-            body = body + "Content-Type: text/html; charset=UTF-8\n"
-            body = body + "Content-Transfer-Encoding: quoted-printable\n\n"
-            body = (
-                body
-                + quopri.encodestring(self.email_body.encode("utf-8")).decode("utf-8")
-                + "\n"
+        msg["Subject"] = self.email_subject
+        msg["User-Agent"] = "pymanip"
+        msg.set_content(self.email_body, subtype="html")
+        for fig in self.email_figlist:
+            msg.add_attachment(
+                self._figure_png(fig),
+                maintype="image",
+                subtype="png",
+                disposition="inline",
             )
 
-            # Add figures
-            for fig in self.email_figlist:
-                plt.figure(fig)
-                (fd, fname) = tempfile.mkstemp(suffix=".png")
-                f_png = os.fdopen(fd, "wb")
-                plt.savefig(f_png)
-                f_png.close()
-                with open(fname, "rb") as image_file:
-                    encoded_figure = base64.b64encode(image_file.read()).decode("ascii")
-                os.remove(fname)
-                # Add image/png MIME part
-                body = body + "--" + mime_boundary + "\n"
-                body = body + "Content-Type: image/png\n"
-                body = body + "Content-Disposition: inline\n"
-                body = body + "Content-Transfer-Encoding: base64\n\n"
-                for i in range(0, len(encoded_figure), 76):
-                    debut = i
-                    fin = i + 75
-                    if fin >= len(encoded_figure):
-                        fin = len(encoded_figure) - 1
-                    body = body + encoded_figure[debut : (fin + 1)] + "\n"
-
-            # Send email
-            try:
-                error_list = smtp.sendmail(
-                    self.email_from_addr,
-                    self.email_to_addrs,
-                    email_header + "\n" + body + "\n" + "--" + mime_boundary + "--\n",
-                )
-                if len(error_list) == 0:
-                    success = True
-            except smtplib.SMTPHeloError:
-                print("SMTP Helo Error")
-                pass
-            except smtplib.SMTPRecipientsRefused:
-                print("Some recipients have been rejected by SMTP server")
-                pass
-            except smtplib.SMTPSenderRefused:
-                print("SMTP server refused sender " + self.email_from_addr)
-                pass
-            except smtplib.SMTPDataError:
-                print("SMTP Data Error")
-                pass
-
-        else:
-            try:
-                email_content = (
-                    email_header.encode("utf-8")
-                    + b"\n"
-                    + quopri.encodestring(self.email_body.encode("utf-8"))
-                )
-                error_list = smtp.sendmail(
-                    self.email_from_addr, self.email_to_addrs, email_content
-                )
-                if len(error_list) == 0:
-                    success = True
-            except smtplib.SMTPHeloError:
-                print("SMTP Helo Error")
-                pass
-            except smtplib.SMTPRecipientsRefused:
-                print("Some recipients have been rejected by SMTP server")
-                pass
-            except smtplib.SMTPSenderRefused:
-                print("SMTP server refused sender " + self.email_from_addr)
-                pass
-            except smtplib.SMTPDataError:
-                print("SMTP Data Error")
-                pass
+        # Send email from a background thread, so that the SMTP conversation
+        # does not block the acquisition (the figures must be rendered by
+        # the caller thread)
+        # The email is timestamped when it is queued, so that
+        # time_since_last_email is up to date when stop_email returns.
+        # The timestamp is rolled back if the email cannot be sent.
+        try:
+            previous = self.parameters["email_lastSent"]
+        except Exception:
+            previous = 0.0
+        queued = time.time()
+        self.parameters["email_lastSent"] = queued
+        if self._io_pool is None:
+            self._io_pool = ThreadPoolExecutor(max_workers=1)
+        future = self._io_pool.submit(
+            self._send_email,
+            self.email_host,
+            self.email_port,
+            self.email_from_addr,
+            self.email_to_addrs,
+            msg,
+            queued,
+            previous,
+        )
+        future.add_done_callback(_report_email_error)
 
-        smtp.quit()
         self.email_body = ""
+        self._email_parts = []
         self.email_started = False
         self.email_figlist = []
-        if success:
-            self.parameters["email_lastSent"] = time.time()
-            date_string = time.strftime(
-                dateformat, time.localtime(self.parameters["email_lastSent"])
-            )
-            print(date_string + ": Email successfully sent.")
 
     def time_since_last_email(self):
         try:
@@ -863,11 +1205,17 @@ class Session(BaseSession):
         if self.email_started:
             self.stop_email()
             print("MI: email stopped.")
+        if self._io_pool is not None:
+            # wait for the queued emails to be sent
+            self._io_pool.shutdown(wait=True)
+            self._io_pool = None
+            self._smtp_close()
         if self.opened:
+            self._flush_buffers()
             self.store.close()
             self.datfile.close()
-            date_string = time.strftime(dateformat, time.localtime(time.time()))
-            self.logfile.write("Session closed on " + date_string)
+            date_string = time.strftime(dateformat)
+            self.logfile.write(("Session closed on " + date_string).encode("utf-8"))
 
             self.logfile.flush()
             self.logfile.close()
@@ -882,7 +1230,7 @@ class Session(BaseSession):
         if hasattr(self, "exited"):
             # let __enter__/__exit__ call self.Stop()
             pass
-        else:
+        elif hasattr(self, "opened"):
             # not inside a with statement, calling Stop when
             # object is being deleted
             self.Stop()
@@ -1,5 +1,9 @@
 import os
+import subprocess
+import sys
 import pytest
+import numpy as np
+import h5py
 import pymanip.session as sess
 
 
@@ -43,6 +47,153 @@ def test_log_addline(tmpdir):
             sesn["toto"]
 
 
+def test_log_addline_buffered(tmpdir, monkeypatch):
+    """
+
+    Test that lines buffered by log_addline are visible before and after
+    they are appended to the HDF5 file
+
+    """
+
+    monkeypatch.setattr(sess.Session, "log_chunk_size", 3)
+    # 5 lines of time and a, rounded up to 2 chunks
+    monkeypatch.setattr(sess.Session, "log_buffer_nbytes", 5 * 16)
+    with sess.Session(os.path.join(tmpdir, "test_session"), ("a",)) as sesn:
+        assert sesn.log_buffer_size == 6
+        for a in range(7):
+            sesn.log_addline()
+            assert (sesn["a"] == range(a + 1)).all()
+            assert sesn["t"].size == a + 1
+
+    with sess.SavedSession(os.path.join(tmpdir, "test_session")) as sesn:
+        assert (sesn["a"] == range(7)).all()
+        assert sesn["t"].size == 7
+
+    # reopened sessions keep the chunk length of the file
+    monkeypatch.undo()
+    with sess.Session(os.path.join(tmpdir, "test_session"), ("a",)) as sesn:
+        assert sesn.log_chunk_size == 3
+        assert sesn.log_buffer_size % 3 == 0
+        for a in range(7, 12):
+            sesn.log_addline()
+        assert (sesn["a"] == range(12)).all()
+
+
+def test_log_dtype(tmpdir):
+    """
+
+    Test variables declared with their dtype
+
+    """
+
+    with sess.Session(
+        os.path.join(tmpdir, "test_session"), ("a", ("b", np.float32), ("c", "u1"))
+    ) as sesn:
+        for a in range(5):
+            b = a / 2  # noqa: F841
+            c = 2 * a  # noqa: F841
+            sesn.log_addline()
+
+    with sess.SavedSession(os.path.join(tmpdir, "test_session")) as sesn:
+        assert sesn["a"].dtype == np.float64
+        assert sesn["b"].dtype == np.float32
+        assert sesn["c"].dtype == np.uint8
+        assert (sesn["b"] == np.arange(5) / 2).all()
+        assert (sesn["c"] == 2 * np.arange(5)).all()
+
+
+def test_log_dtype_conversion(tmpdir, monkeypatch):
+    """
+
+    Test that out of range values are converted the same way in whole and
+    partial chunks
+
+    """
+
+    monkeypatch.setattr(sess.Session, "log_chunk_size", 3)
+    monkeypatch.setattr(sess.Session, "log_buffer_nbytes", 1)
+    with sess.Session(os.path.join(tmpdir, "test_session"), (("c", "u1"),)) as sesn:
+        for c in (300, -1, 2.0, 300, -1):
+            sesn.log_addline()
+
+    with sess.SavedSession(os.path.join(tmpdir, "test_session")) as sesn:
+        assert (sesn["c"] == [255, 0, 2, 255, 0]).all()
+
+
+def test_log_tail(tmpdir):
+    """
+
+    Test that log_tail returns the last logged values
+
+    """
+
+    with sess.Session(os.path.join(tmpdir, "test_session"), ("a",)) as sesn:
+        for a in range(5):
+            sesn.log_addline()
+        assert (sesn.log_tail("a", 3) == [2, 3, 4]).all()
+        assert (sesn.log_tail("a", 10) == range(5)).all()
+        assert (sesn.log_tail("t", 2) == sesn["t"][-2:]).all()
+
+
+@pytest.mark.parametrize("compression", [None, "blosc"])
+def test_log_compression(tmpdir, compression):
+    """
+
+    Test sessions logged with other filters than gzip. They are read back
+    in a new process, which has not imported hdf5plugin itself.
+
+    """
+
+    if compression == "blosc":
+        pytest.importorskip("hdf5plugin")
+    with sess.Session(
+        os.path.join(tmpdir, "test_session"), ("a", "b"), compression=compression
+    ) as sesn:
+        for a in range(5):
+            b = a / 2  # noqa: F841
+            sesn.log_addline()
+
+    script = (
+        "import sys, numpy as np, pymanip.session as sess\n"
+        "with sess.SavedSession(sys.argv[1]) as sesn:\n"
+        "    assert (sesn['a'] == range(5)).all()\n"
+        "    assert (sesn['b'] == np.arange(5) / 2).all()\n"
+    )
+    subprocess.run(
+        [sys.executable, "-c", script, os.path.join(tmpdir, "test_session")],
+        check=True,
+    )
+
+
+def test_unavailable_filter(tmpdir):
+    """
+
+    Test that sessions using an unavailable HDF5 filter are neither read
+    nor overwritten
+
+    """
+
+    with h5py.File(os.path.join(tmpdir, "test_session.hdf5"), "w") as f:
+        f.create_dataset(
+            "time",
+            shape=(3,),
+            maxshape=(None,),
+            chunks=(4,),
+            dtype=float,
+            compression=65000,
+            allow_unknown_filter=True,
+        )
+        f.create_group("variables")
+
+    with pytest.raises(RuntimeError):
+        with sess.SavedSession(os.path.join(tmpdir, "test_session")):
+            pass
+    with pytest.raises(RuntimeError):
+        sess.Session(os.path.join(tmpdir, "test_session"), ("a",))
+    with h5py.File(os.path.join(tmpdir, "test_session.hdf5"), "r") as f:
+        assert f["time"].shape == (3,)
+
+
 def test_cache(tmpdir):
     """
 
@@ -449,7 +449,7 @@ class Oscillo:
                 self.paused = False
                 if not self.running:
                     break
-                self.system.start()
+                await self.system.start_async()
                 data = await self.system.read()
                 await self.system.stop()
                 if data is None: